@@ -1,95 +1,147 @@
+import asyncio
 import re
 from urllib.parse import urljoin
 
-import requests
-from bs4 import BeautifulSoup
+import httpx
+import lxml.html
+from lxml import etree
 
 
 BASE_URL = "https://books.toscrape.com/"
-PAGE_URL = urljoin(BASE_URL, "catalogue/page-1.html")
+CATALOGUE_URL = urljoin(BASE_URL, "catalogue/")
+PAGE_URL = urljoin(CATALOGUE_URL, "page-1.html")
+PAGES = 5
+PAGE_URLS = [urljoin(CATALOGUE_URL, f"page-{n}.html") for n in range(1, PAGES + 1)]
+
+# Compiled once, reused for every page and article
+ARTICLES = etree.XPath("//article[contains(@class, 'product_pod')]")
+TITLE = etree.XPath(".//h3/a")
+PRICE = etree.XPath(".//*[contains(@class, 'price_color')]/text()")
+RATING = etree.XPath(".//p[contains(@class, 'star-rating')]/@class")
+_PRICE_RE = re.compile(r"(\d+(?:\.\d+)?)")
 
 
 def parse_price(text: str):
-    m = re.search(r"(\d+(\.\d+)?)", text.replace(",", "."))
+    m = _PRICE_RE.search(text.replace(",", "."))
     return float(m.group(1)) if m else None
 
 
 def get_rating(article):
-    p = article.select_one("p.star-rating")
-    if not p:
+    classes = RATING(article)
+    if not classes:
         return None
-    for c in p.get("class", []):
+    for c in classes[0].split():
         if c != "star-rating":
             return c
     return None
 
 
-def fetch_html(url: str) -> str:
-    r = requests.get(
-        url,
-        headers={"User-Agent": "Mozilla/5.0"},
-        timeout=15,
-    )
+def book_link(href: str) -> str:
+    # Catalogue pages link books as "slug_1000/index.html", relative to
+    # catalogue/; plain concatenation skips urljoin's URL parsing for those.
+    # Anything urljoin would rewrite (dot segments, absolute or rooted URLs,
+    # query/fragment-only refs) falls back to it.
+    if href[:1] not in "/.?#" and ":" not in href and "/." not in href:
+        return CATALOGUE_URL + href
+    return urljoin(PAGE_URL, href)
+
+
+async def fetch_html(client: httpx.AsyncClient, url: str) -> str:
+    r = await client.get(url)
     r.raise_for_status()
     return r.text
 
 
 def parse_books(html: str):
-    soup = BeautifulSoup(html, "lxml")
+    doc = lxml.html.fromstring(html)
     books = []
 
-    for a in soup.select("article.product_pod"):
-        title_el = a.select_one("h3 a")
-        price_el = a.select_one(".price_color")
+    for a in ARTICLES(doc):
+        title_el = next(iter(TITLE(a)), None)
+        price = PRICE(a)
 
         books.append(
             {
-                "title": title_el.get("title") if title_el else None,
-                "price": parse_price(price_el.text) if price_el else None,
+                "title": title_el.get("title") if title_el is not None else None,
+                "price": parse_price(price[0]) if price else None,
                 "rating": get_rating(a),
-                "link": urljoin(PAGE_URL, title_el.get("href")) if title_el else None,
+                "link": book_link(title_el.get("href", "")) if title_el is not None else None,
             }
         )
 
     return books
 
 
+async def scrape_page(client: httpx.AsyncClient, url: str):
+    html = await fetch_html(client, url)
+    # Parse in a worker thread so it overlaps with the other pages' downloads
+    return await asyncio.to_thread(parse_books, html)
+
+
+async def scrape_all(urls):
+    # One client for all pages: connections are kept alive and, over HTTP/2,
+    # requests to the same host are multiplexed on a single TLS connection.
+    async with httpx.AsyncClient(
+        http2=True,
+        headers={"User-Agent": "Mozilla/5.0"},
+        timeout=15,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+    ) as client:
+        pages = await asyncio.gather(*(scrape_page(client, u) for u in urls))
+
+    return [book for page in pages for book in page]
+
+
 def save_csv(rows, path):
     import csv
     from pathlib import Path
 
     Path(path).parent.mkdir(parents=True, exist_ok=True)
 
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=rows[0].keys())
-        w.writeheader()
-        w.writerows(rows)
+    with open(path, "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
+        # Plain csv.writer over value lists; DictWriter re-maps every row by key
+        keys = list(rows[0].keys())
+        w = csv.writer(f)
+        w.writerow(keys)
+        w.writerows([r[k] for k in keys] for r in rows)
 
 
 def save_xlsx(rows, path):
     from pathlib import Path
 
-    import openpyxl
-
     Path(path).parent.mkdir(parents=True, exist_ok=True)
 
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "books"
+    header = list(rows[0].keys())
+
+    # pyexcelerate is an optional, faster writer for plain (unstyled) cells
+    try:
+        from pyexcelerate import Workbook
+    except ImportError:
+        Workbook = None
+
+    if Workbook is not None:
+        wb = Workbook()
+        wb.new_sheet("books", data=[header] + [list(r.values()) for r in rows])
+        wb.save(path)
+        return
+
+    import xlsxwriter
+
+    wb = xlsxwriter.Workbook(path, {"constant_memory": True, "strings_to_urls": False})
+    ws = wb.add_worksheet("books")
 
-    ws.append(list(rows[0].keys()))
-    for r in rows:
-        ws.append(list(r.values()))
+    ws.write_row(0, 0, header)
+    for i, r in enumerate(rows, start=1):
+        ws.write_row(i, 0, list(r.values()))
 
-    wb.save(path)
+    wb.close()
 
 
 def main():
-    html = fetch_html(PAGE_URL)
-    books = parse_books(html)
+    books = asyncio.run(scrape_all(PAGE_URLS))
 
-    save_csv(books, "data/books_page1.csv")
-    save_xlsx(books, "data/books_page1.xlsx")
+    save_csv(books, "data/books.csv")
+    save_xlsx(books, "data/books.xlsx")
 
     print(f"Saved {len(books)} items")
 
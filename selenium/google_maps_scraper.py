@@ -1,8 +1,12 @@
 
 import time
 import re
+import queue
 import logging
-from dataclasses import dataclass, field
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from operator import attrgetter
 from typing import Optional
 
 from selenium import webdriver
@@ -16,9 +20,7 @@ from selenium.common.exceptions import (
     TimeoutException,
     StaleElementReferenceException,
 )
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
+import xlsxwriter
 
 
 #  CONFIGURATION — edit these values as needed
@@ -26,9 +28,11 @@ from openpyxl.utils import get_column_letter
 SEARCH_QUERY   = "restaurants in New York"   # Google Maps search query
 MAX_RESULTS    = 60                           # Max number of places to scrape
 OUTPUT_FILE    = "nyc_restaurants.xlsx"       # Output Excel filename
-SCROLL_PAUSE   = 2.0                          # Seconds to wait between scrolls
+SCROLL_PAUSE   = 1.0                          # Max seconds to wait for new cards after a scroll
+SCROLL_POLL    = 0.1                          # Seconds between card-count checks while waiting
 PAGE_LOAD_WAIT = 10                           # Max seconds to wait for page elements
-HEADLESS       = False                        # Set True to run browser in background
+HEADLESS       = True                         # Set False to watch the browser window
+WORKERS        = 4                            # Parallel browser sessions for place pages
 
 
 #  LOGGING SETUP
@@ -44,7 +48,7 @@ log = logging.getLogger(__name__)
 
 #  DATA MODEL
 
-@dataclass
+@dataclass(slots=True)
 class Restaurant:
     """Holds all scraped data for a single restaurant."""
     name:         str            = "N/A"
@@ -60,7 +64,7 @@ class Restaurant:
 # ─────────────────────────────────────────────
 #  BROWSER SETUP
 # ─────────────────────────────────────────────
-def build_driver(headless: bool = False) -> webdriver.Chrome:
+def build_driver(headless: bool = True) -> webdriver.Chrome:
     """
     Configure and return a Chrome WebDriver instance.
     Adds stealth options to reduce bot-detection risk.
@@ -70,6 +74,14 @@ def build_driver(headless: bool = False) -> webdriver.Chrome:
     if headless:
         options.add_argument("--headless=new")
 
+    # Return from driver.get() once the DOM is ready instead of waiting for
+    # every map tile and script; explicit waits cover the elements we need.
+    options.page_load_strategy = "eager"
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2,
+    })
+
     # General stealth & stability options
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
@@ -108,6 +120,11 @@ def safe_find_text(driver, css_selector: str, default: str = "N/A") -> str:
         return default
 
 
+def clean_text(raw: Optional[str], default: str = "N/A") -> str:
+    """Strip a scraped text value, falling back to `default` if it is empty."""
+    return (raw or "").strip() or default
+
+
 def parse_rating(raw: str) -> Optional[float]:
     """Convert a rating string like '4.5' to float, or None if invalid."""
     try:
@@ -116,18 +133,147 @@ def parse_rating(raw: str) -> Optional[float]:
         return None
 
 
+_NONDIGIT_RE = re.compile(r"[^\d]")
+
+
 def parse_review_count(raw: str) -> int:
     """
     Extract integer review count from strings like '(1,234)' or '1234 reviews'.
     Returns 0 if parsing fails.
     """
-    digits = re.sub(r"[^\d]", "", raw)
+    digits = _NONDIGIT_RE.sub("", raw)
     return int(digits) if digits else 0
 
 
+def open_maps(driver) -> None:
+    """
+    Open the Google Maps start page and dismiss the cookie consent screen
+    if it appears (EU regions). Every fresh browser session needs this once,
+    otherwise place URLs land on the consent page instead of the place.
+    """
+    # Force English language via URL parameter
+    driver.get("https://www.google.com/maps?hl=en")
+    # Wait for either the search box or the cookie consent page
+    try:
+        WebDriverWait(driver, PAGE_LOAD_WAIT).until(EC.any_of(
+            EC.presence_of_element_located((By.ID, "searchboxinput")),
+            EC.presence_of_element_located(
+                (By.XPATH, '//button[contains(., "Accept all") or contains(., "Reject all")]')
+            ),
+        ))
+    except TimeoutException:
+        pass
+
+    # Dismiss cookie consent if it appears (EU regions)
+    try:
+        consent_btn = driver.find_element(
+            By.XPATH, '//button[contains(., "Accept all") or contains(., "Reject all")]'
+        )
+        consent_btn.click()
+        time.sleep(1)
+    except NoSuchElementException:
+        pass
+
+
+# ─────────────────────────────────────────────
+#  PLACE EXTRACTION
+# ─────────────────────────────────────────────
+# Reads every detail field of an open place page in a single WebDriver call.
+# Missing elements come back as null and are mapped to defaults in Python.
+PLACE_DETAILS_JS = """
+const text = (sel) => document.querySelector(sel)?.innerText ?? null;
+return {
+    name:    text('h1.DUwDvf, h1[class*="fontHeadlineLarge"]'),
+    rating:  text('div.F7nice span[aria-hidden="true"]'),
+    reviews: document.querySelector('div.F7nice span[aria-label*="review"]')
+                 ?.getAttribute('aria-label') ?? null,
+    cuisine: text('button.DkEaL, span.mgr77e'),
+    address: text('button[data-item-id="address"] .Io6YTe'),
+    phone:   text('button[data-item-id*="phone"] .Io6YTe'),
+    website: text('a[data-item-id="authority"] .Io6YTe'),
+};
+"""
+
+
+def extract_place(driver, place_url: str) -> Restaurant:
+    """
+    Open a single Google Maps place page and extract its details.
+    Raises TimeoutException if the session was redirected to the consent
+    page; callers skip such places.
+    """
+    restaurant = Restaurant()
+    restaurant.maps_url = place_url
+
+    # Navigate directly to the place page — completely avoids StaleElement.
+    # The header wait below replaces a fixed sleep, so parallel sessions
+    # only block as long as their own page needs.
+    driver.get(place_url)
+
+    # Wait for the place header so the details panel has rendered
+    try:
+        WebDriverWait(driver, PAGE_LOAD_WAIT).until(
+            EC.presence_of_element_located(
+                (By.CSS_SELECTOR, 'h1.DUwDvf, h1[class*="fontHeadlineLarge"]')
+            )
+        )
+    except TimeoutException:
+        # A consent redirect has no place data at all; anything else (e.g. a
+        # renamed header class) still gets the remaining fields read below.
+        if "consent." in driver.current_url:
+            raise
+
+    # One execute_script round trip instead of a find_element call per field
+    data = driver.execute_script(PLACE_DETAILS_JS) or {}
+
+    restaurant.name         = clean_text(data.get("name"))
+    restaurant.rating       = parse_rating(data.get("rating"))
+    restaurant.review_count = parse_review_count(data.get("reviews") or "")
+    restaurant.cuisine      = clean_text(data.get("cuisine"))
+    restaurant.address      = clean_text(data.get("address"))
+    restaurant.phone        = clean_text(data.get("phone"))
+    restaurant.website      = clean_text(data.get("website"))
+
+    return restaurant
+
+
+def add_pooled_driver(pool: queue.Queue, drivers: list) -> None:
+    """
+    Start an extra browser session, take it through the Maps consent screen,
+    and hand it to `pool`. The driver is recorded in `drivers` first so the
+    caller quits it even if warm-up fails.
+    """
+    driver = build_driver(headless=HEADLESS)
+    drivers.append(driver)
+    open_maps(driver)
+    pool.put(driver)
+
+
+def extract_from_pool(pool: queue.Queue, place_url: str) -> Restaurant:
+    """
+    Borrow a driver from `pool`, extract one place, and return the driver
+    so the next queued URL can reuse the same browser session.
+    """
+    driver = pool.get()
+    try:
+        return extract_place(driver, place_url)
+    finally:
+        pool.put(driver)
+
+
 # ─────────────────────────────────────────────
 #  MAIN SCRAPER
 # ─────────────────────────────────────────────
+# Number of place cards currently loaded in the results panel
+PLACE_COUNT_JS = """return document.querySelectorAll('a[href*="/maps/place/"]').length;"""
+
+# Unique place URLs currently loaded in the results panel, in page order
+PLACE_URLS_JS = """
+return Array.from(new Set(
+    Array.from(document.querySelectorAll('a[href*="/maps/place/"]')).map(a => a.href)
+));
+"""
+
+
 def scrape_google_maps(query: str, max_results: int) -> list[Restaurant]:
     """
     Open Google Maps, search for `query`, scroll through results,
@@ -135,26 +281,15 @@ def scrape_google_maps(query: str, max_results: int) -> list[Restaurant]:
 
     Returns a list of Restaurant dataclass instances.
     """
-    driver = build_driver(headless=HEADLESS)
-    wait   = WebDriverWait(driver, PAGE_LOAD_WAIT)
+    driver  = build_driver(headless=HEADLESS)
+    drivers = [driver]
+    wait    = WebDriverWait(driver, PAGE_LOAD_WAIT)
     results: list[Restaurant] = []
 
     try:
         # ── Step 1: Open Google Maps ──────────────────────────────────────
         log.info("Opening Google Maps …")
-        # Force English language via URL parameter
-        driver.get("https://www.google.com/maps?hl=en")
-        time.sleep(4)  # Wait longer for full page load
-
-        # Dismiss cookie consent if it appears (EU regions)
-        try:
-            consent_btn = driver.find_element(
-                By.XPATH, '//button[contains(., "Accept all") or contains(., "Reject all")]'
-            )
-            consent_btn.click()
-            time.sleep(1)
-        except NoSuchElementException:
-            pass
+        open_maps(driver)
 
         # ── Step 2: Enter search query ────────────────────────────────────
         log.info(f"Searching for: '{query}'")
@@ -188,7 +323,6 @@ def scrape_google_maps(query: str, max_results: int) -> list[Restaurant]:
         search_box.send_keys(query)
         time.sleep(1)
         search_box.send_keys(Keys.ENTER)
-        time.sleep(4)
 
         # ── Step 3: Scroll the results panel to load more listings ────────
         log.info("Scrolling results panel to load listings …")
@@ -202,29 +336,33 @@ def scrape_google_maps(query: str, max_results: int) -> list[Restaurant]:
             log.warning("Results panel not found — check if the search returned results.")
             return results
 
-        # Scroll loop: keep scrolling until we have enough cards or hit the end
-        last_count = 0
+        # Scroll loop: keep scrolling until we have enough cards or hit the end.
+        # Cards are counted in the browser, so no element references are
+        # serialized back to Python on each step.
+        current_count = driver.execute_script(PLACE_COUNT_JS)
         stall_counter = 0
 
-        while len(results) < max_results and stall_counter < 5:
-            # Collect all currently loaded place cards
-            cards = driver.find_elements(
-                By.CSS_SELECTOR, 'a[href*="/maps/place/"]'
-            )
-            current_count = len(cards)
-
+        while current_count < max_results and stall_counter < 5:
             log.info(f"  Loaded {current_count} listing cards so far …")
 
             # Scroll the panel down
             driver.execute_script("arguments[0].scrollTop += 1200;", panel)
-            time.sleep(SCROLL_PAUSE)
+
+            # Poll for new cards instead of sleeping a fixed pause
+            new_count = current_count
+            deadline = time.monotonic() + SCROLL_PAUSE
+            while time.monotonic() < deadline:
+                time.sleep(SCROLL_POLL)
+                new_count = driver.execute_script(PLACE_COUNT_JS)
+                if new_count > current_count:
+                    break
 
             # Detect if new cards appeared; if not, increment stall counter
-            if current_count == last_count:
-                stall_counter += 1
-            else:
+            if new_count > current_count:
                 stall_counter = 0
-                last_count = current_count
+            else:
+                stall_counter += 1
+            current_count = new_count
 
         # ── Step 4: Collect all place URLs first, then visit each directly ──
         # This completely avoids StaleElementReferenceException.
@@ -232,116 +370,48 @@ def scrape_google_maps(query: str, max_results: int) -> list[Restaurant]:
         # navigate to each URL independently — no DOM dependency at all.
         log.info("Collecting all place URLs from results panel …")
 
-        place_urls = []
-        seen = set()
-
-        all_anchors = driver.find_elements(By.CSS_SELECTOR, 'a[href*="/maps/place/"]')
-        for a in all_anchors:
-            try:
-                href = a.get_attribute("href")
-                if href and href not in seen:
-                    seen.add(href)
-                    place_urls.append(href)
-            except StaleElementReferenceException:
-                continue
-
-        place_urls = place_urls[:max_results]
+        # One call returns the deduplicated hrefs in page order, instead of
+        # a get_attribute round trip per anchor.
+        place_urls = driver.execute_script(PLACE_URLS_JS)[:max_results]
         log.info(f"Collected {len(place_urls)} unique place URLs. Starting extraction …")
 
-        for idx, place_url in enumerate(place_urls, start=1):
-            restaurant = Restaurant()
-            restaurant.maps_url = place_url
-
-            try:
-                # Navigate directly to the place page — completely avoids StaleElement
-                driver.get(place_url)
-                time.sleep(3)
-
-                # ── Name ──────────────────────────────────────────────────
-                try:
-                    name_el = wait.until(
-                        EC.presence_of_element_located(
-                            (By.CSS_SELECTOR, 'h1.DUwDvf, h1[class*="fontHeadlineLarge"]')
-                        )
-                    )
-                    restaurant.name = name_el.text.strip()
-                except TimeoutException:
-                    restaurant.name = "N/A"
-
-                # ── Rating ────────────────────────────────────────────────
-                try:
-                    rating_el = driver.find_element(
-                        By.CSS_SELECTOR,
-                        'div.F7nice span[aria-hidden="true"]'
-                    )
-                    restaurant.rating = parse_rating(rating_el.text)
-                except NoSuchElementException:
-                    restaurant.rating = None
-
-                # ── Review count ──────────────────────────────────────────
-                try:
-                    reviews_el = driver.find_element(
-                        By.CSS_SELECTOR,
-                        'div.F7nice span[aria-label*="review"]'
-                    )
-                    restaurant.review_count = parse_review_count(
-                        reviews_el.get_attribute("aria-label")
-                    )
-                except NoSuchElementException:
-                    restaurant.review_count = 0
-
-                # ── Cuisine / Category ────────────────────────────────────
-                try:
-                    cuisine_el = driver.find_element(
-                        By.CSS_SELECTOR,
-                        'button.DkEaL, span.mgr77e'
-                    )
-                    restaurant.cuisine = cuisine_el.text.strip()
-                except NoSuchElementException:
-                    restaurant.cuisine = "N/A"
-
-                # ── Address ───────────────────────────────────────────────
+        # ── Step 5: Visit place pages in parallel with a driver pool ──────
+        # Each visit is independent and dominated by network/render latency,
+        # so WORKERS browser sessions give a near-linear speedup. The search
+        # driver is reused as one of the workers; the extra sessions start
+        # concurrently on the same executor and join the pool as soon as
+        # they are through the consent screen, while extraction is running.
+        workers = max(1, min(WORKERS, len(place_urls)))
+        pool: queue.Queue = queue.Queue()
+        pool.put(driver)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            warmups = [
+                executor.submit(add_pooled_driver, pool, drivers)
+                for _ in range(workers - 1)
+            ]
+            futures = [executor.submit(extract_from_pool, pool, url) for url in place_urls]
+
+            for idx, future in enumerate(futures, start=1):
                 try:
-                    addr_el = driver.find_element(
-                        By.CSS_SELECTOR,
-                        'button[data-item-id="address"] .Io6YTe'
-                    )
-                    restaurant.address = addr_el.text.strip()
-                except NoSuchElementException:
-                    restaurant.address = "N/A"
-
-                # ── Phone ─────────────────────────────────────────────────
-                try:
-                    phone_el = driver.find_element(
-                        By.CSS_SELECTOR,
-                        'button[data-item-id*="phone"] .Io6YTe'
-                    )
-                    restaurant.phone = phone_el.text.strip()
-                except NoSuchElementException:
-                    restaurant.phone = "N/A"
-
-                # ── Website ───────────────────────────────────────────────
-                try:
-                    web_el = driver.find_element(
-                        By.CSS_SELECTOR,
-                        'a[data-item-id="authority"] .Io6YTe'
-                    )
-                    restaurant.website = web_el.text.strip()
-                except NoSuchElementException:
-                    restaurant.website = "N/A"
+                    restaurant = future.result()
+                except (StaleElementReferenceException, TimeoutException) as exc:
+                    log.warning(f"  [{idx}] Skipped — {type(exc).__name__}: {place_urls[idx - 1]}")
+                    continue
 
                 results.append(restaurant)
                 log.info(
-                    f"  [{idx}/{len(cards)}] ✓ {restaurant.name} "
+                    f"  [{idx}/{len(place_urls)}] ✓ {restaurant.name} "
                     f"| ⭐ {restaurant.rating} ({restaurant.review_count} reviews)"
                 )
 
-            except (StaleElementReferenceException, TimeoutException) as exc:
-                log.warning(f"  [{idx}] Skipped — {type(exc).__name__}")
-                continue
+            for warmup in warmups:
+                if warmup.exception() is not None:
+                    log.warning(f"Extra browser session failed to start — {warmup.exception()!r}")
 
     finally:
-        driver.quit()
+        for d in drivers:
+            d.quit()
         log.info("Browser closed.")
 
     return results
@@ -372,9 +442,10 @@ def export_to_excel(data: list[Restaurant], filename: str) -> None:
     Write scraped restaurant data to a formatted Excel workbook.
     Applies header styling, alternating row colors, and auto-fits columns.
     """
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "NYC Restaurants"
+    # constant_memory streams each row to disk as soon as the next one starts,
+    # so rows must be written strictly top to bottom.
+    wb = xlsxwriter.Workbook(filename, {"constant_memory": True, "strings_to_urls": False})
+    ws = wb.add_worksheet("NYC Restaurants")
 
     # ── Header row ────────────────────────────────────────────────────────
     headers = [
@@ -383,76 +454,69 @@ def export_to_excel(data: list[Restaurant], filename: str) -> None:
     ]
 
     # Styling constants
-    HEADER_BG    = "1A73E8"   # Google-blue
-    HEADER_FONT  = "FFFFFF"
-    ROW_ALT_BG   = "EAF1FB"   # Light blue for alternating rows
-    BORDER_COLOR = "BFCFE8"
-
-    thin_border = Border(
-        left=Side(style="thin", color=BORDER_COLOR),
-        right=Side(style="thin", color=BORDER_COLOR),
-        top=Side(style="thin", color=BORDER_COLOR),
-        bottom=Side(style="thin", color=BORDER_COLOR),
-    )
-
-    # Write and style header
-    for col_idx, header in enumerate(headers, start=1):
-        cell = ws.cell(row=1, column=col_idx, value=header)
-        cell.font      = Font(bold=True, color=HEADER_FONT, size=11)
-        cell.fill      = PatternFill("solid", fgColor=HEADER_BG)
-        cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        cell.border    = thin_border
+    HEADER_BG    = "#1A73E8"   # Google-blue
+    HEADER_FONT  = "#FFFFFF"
+    ROW_ALT_BG   = "#EAF1FB"   # Light blue for alternating rows
+    BORDER_COLOR = "#BFCFE8"
+    TOP_RATED    = "#0A6E0A"   # Dark green
+
+    # Formats are created once and shared by every cell that uses them
+    cell_style = {"valign": "vcenter", "text_wrap": True, "border": 1, "border_color": BORDER_COLOR}
+    header_fmt = wb.add_format({
+        **cell_style,
+        "bold": True, "font_color": HEADER_FONT, "font_size": 11,
+        "bg_color": HEADER_BG, "align": "center",
+    })
+    # Keyed by (is_alt_row, is_top_rated)
+    row_fmts = {
+        (False, False): wb.add_format(cell_style),
+        (True,  False): wb.add_format({**cell_style, "bg_color": ROW_ALT_BG}),
+        (False, True):  wb.add_format({**cell_style, "bold": True, "font_color": TOP_RATED}),
+        (True,  True):  wb.add_format({**cell_style, "bg_color": ROW_ALT_BG,
+                                       "bold": True, "font_color": TOP_RATED}),
+    }
+    bold_fmt = wb.add_format({"bold": True})
 
-    ws.row_dimensions[1].height = 30
-
-    # ── Data rows ─────────────────────────────────────────────────────────
-    for row_idx, r in enumerate(data, start=2):
-        row_data = [
-            row_idx - 1,          # Row number
-            r.name,
-            r.cuisine,
-            r.rating if r.rating is not None else "N/A",
-            r.review_count,
-            r.address,
-            r.phone,
-            r.website,
-            r.maps_url,
-        ]
+    # ── Column widths ─────────────────────────────────────────────────────
+    col_widths = [5, 32, 20, 10, 12, 38, 16, 28, 50]
+    for col_idx, width in enumerate(col_widths):
+        ws.set_column(col_idx, col_idx, width)
 
-        is_alt_row = (row_idx % 2 == 0)
-        fill = PatternFill("solid", fgColor=ROW_ALT_BG) if is_alt_row else None
+    # ── Freeze header row ─────────────────────────────────────────────────
+    ws.freeze_panes(1, 0)
 
-        for col_idx, value in enumerate(row_data, start=1):
-            cell = ws.cell(row=row_idx, column=col_idx, value=value)
-            cell.alignment = Alignment(vertical="center", wrap_text=True)
-            cell.border    = thin_border
-            if fill:
-                cell.fill = fill
+    # Write and style header
+    ws.set_row(0, 30)
+    ws.write_row(0, 0, headers, header_fmt)
 
-            # Highlight top-rated restaurants (rating >= 4.5 and 500+ reviews)
-            if col_idx == 4 and isinstance(value, float) and value >= 4.5:
-                cell.font = Font(bold=True, color="0A6E0A")  # Dark green
+    # ── Data rows ─────────────────────────────────────────────────────────
+    row_fields = attrgetter(
+        "name", "cuisine", "rating", "review_count",
+        "address", "phone", "website", "maps_url",
+    )
 
-        ws.row_dimensions[row_idx].height = 22
+    for row_idx, r in enumerate(data, start=1):
+        row_data = (row_idx, *row_fields(r))     # Row number + place fields
 
-    # ── Column widths ─────────────────────────────────────────────────────
-    col_widths = [5, 32, 20, 10, 12, 38, 16, 28, 50]
-    for col_idx, width in enumerate(col_widths, start=1):
-        ws.column_dimensions[get_column_letter(col_idx)].width = width
+        is_alt_row = (row_idx % 2 == 1)
 
-    # ── Freeze header row ─────────────────────────────────────────────────
-    ws.freeze_panes = "A2"
+        ws.set_row(row_idx, 22)
+        for col_idx, value in enumerate(row_data):
+            if value is None:                    # Missing rating
+                value = "N/A"
+            # Highlight top-rated restaurants (rating >= 4.5)
+            is_top_rated = col_idx == 3 and isinstance(value, float) and value >= 4.5
+            ws.write(row_idx, col_idx, value, row_fmts[is_alt_row, is_top_rated])
 
     # ── Summary row at the bottom ─────────────────────────────────────────
-    summary_row = len(data) + 2
-    ws.cell(row=summary_row, column=1, value="Total").font = Font(bold=True)
-    ws.cell(row=summary_row, column=2, value=len(data)).font = Font(bold=True)
-    avg_rating = (
-        sum(r.rating for r in data if r.rating) / max(1, sum(1 for r in data if r.rating))
-    )
-    ws.cell(row=summary_row, column=4, value=round(avg_rating, 2)).font = Font(bold=True)
-
-    wb.save(filename)
+    summary_row = len(data) + 1
+    ratings = [r.rating for r in data if r.rating is not None]
+    avg_rating = statistics.fmean(ratings) if ratings else 0.0
+    ws.write(summary_row, 0, "Total", bold_fmt)
+    ws.write(summary_row, 1, len(data), bold_fmt)
+    ws.write(summary_row, 3, round(avg_rating, 2), bold_fmt)
+
+    wb.close()
     log.info(f"Excel report saved → {filename}")
 
 
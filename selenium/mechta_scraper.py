@@ -2,12 +2,15 @@ import os
 import time
 import random
 import pandas as pd
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
 from webdriver_manager.core.os_manager import ChromeType
 
@@ -31,7 +34,13 @@ def get_driver():
     options.add_experimental_option("excludeSwitches", ["enable-automation"])
     options.add_experimental_option('useAutomationExtension', False)
 
- 
+    # Product images are not scraped, so skip downloading them
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2,
+    })
+
     service = Service(ChromeDriverManager(chrome_type=ChromeType.CHROMIUM).install())
 
     driver = webdriver.Chrome(service=service, options=options)
@@ -57,21 +66,16 @@ def clean_name(name: str) -> str:
     return " ".join(name.split())
 
 
-def parse_listing(html: str):
+def build_items(cards):
     """
-    Parse product cards directly from the category page.
+    Turn raw (href, name, price) card tuples into catalog items.
 
-    Extracts:
-    - product URL
-    - product name
-    - price from nearby span containing ₸ symbol
+    Drops cards without a link or a usable name and deduplicates by URL.
     """
-    soup = BeautifulSoup(html, "html.parser")
     items = []
     seen = set()
 
-    for a in soup.select('a[href^="/product/"]'):
-        href = a.get("href")
+    for href, name, price in cards:
         if not href:
             continue
 
@@ -79,18 +83,10 @@ def parse_listing(html: str):
         if url in seen:
             continue
 
-        name = clean_name(a.get_text(" ", strip=True))
+        name = clean_name(name)
         if not name or len(name) < 5:
             continue
 
-        # Locate parent card container
-        card = a.find_parent("div")
-        if not card:
-            continue
-
-        # Find price element nearby
-        price_el = card.find_next("span", string=lambda x: x and "₸" in x)
-        price = price_el.get_text(strip=True) if price_el else "N/A"
         price = " ".join(price.split())
 
         items.append({
@@ -104,6 +100,79 @@ def parse_listing(html: str):
     return items
 
 
+# Product cards are read inside the live page, so only a small JSON array
+# crosses the WebDriver connection instead of the full page_source.
+# For each /product/ link: the card is its nearest ancestor div, and the price
+# is the first span at or after that card whose only string contains ₸.
+LISTING_JS = """
+const texts = (el, sep) => {
+    const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+    const parts = [];
+    while (walker.nextNode()) {
+        const t = walker.currentNode.nodeValue.trim();
+        if (t) parts.push(t);
+    }
+    return parts.join(sep);
+};
+
+// Like BeautifulSoup's .string: follow single-child chains down to one text node
+const singleString = (el) => {
+    while (el.childNodes.length === 1 && el.firstChild.nodeType === Node.ELEMENT_NODE) {
+        el = el.firstChild;
+    }
+    if (el.childNodes.length !== 1 || el.firstChild.nodeType !== Node.TEXT_NODE) return null;
+    return el.firstChild.nodeValue;
+};
+
+const prices = Array.from(document.querySelectorAll('span')).filter(s =>
+    (singleString(s) || '').includes('₸'));
+
+// Binary search for the first price span at or after `card` in document order
+const firstPriceFrom = (card) => {
+    let lo = 0, hi = prices.length;
+    while (lo < hi) {
+        const mid = (lo + hi) >> 1;
+        if (card.compareDocumentPosition(prices[mid]) & Node.DOCUMENT_POSITION_FOLLOWING) hi = mid;
+        else lo = mid + 1;
+    }
+    return prices[lo];
+};
+
+return Array.from(document.querySelectorAll('a[href^="/product/"]')).map(a => {
+    const card = a.parentElement && a.parentElement.closest('div');
+    if (!card) return null;
+    const price = firstPriceFrom(card);
+    return [a.getAttribute('href'), texts(a, ' '), price ? texts(price, '') : 'N/A'];
+}).filter(Boolean);
+"""
+
+
+def extract_listing(driver):
+    """
+    Extract product cards from the page currently open in `driver`.
+
+    Returns items with:
+    - product URL
+    - product name
+    - price from nearby span containing ₸ symbol
+    """
+    return build_items(driver.execute_script(LISTING_JS))
+
+
+def save_xlsx(df: pd.DataFrame, path: str) -> None:
+    """
+    Write the catalog to Excel with the xlsxwriter engine.
+    constant_memory is deliberately not used: pandas writes column by column,
+    and constant_memory drops writes to rows it has already flushed.
+    """
+    df.to_excel(
+        path,
+        index=False,
+        engine="xlsxwriter",
+        engine_kwargs={"options": {"strings_to_urls": False}},
+    )
+
+
 def main():
     driver = get_driver()
     rows = []
@@ -112,7 +181,6 @@ def main():
     try:
         print("[start] Opening category page...")
         driver.get(CATEGORY_URL)
-        time.sleep(2)
 
         input("Complete Cloudflare/location verification if required, wait for products to load, then press Enter...")
 
@@ -122,10 +190,15 @@ def main():
             print(f"[page] {page_num} -> {page_url}")
 
             driver.get(page_url)
-            time.sleep(2)
+            try:
+                WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, 'a[href^="/product/"]'))
+                )
+            except TimeoutException:
+                pass  # handled below as "no products detected"
             scroll_page(driver, steps=8)
 
-            items = parse_listing(driver.page_source)
+            items = extract_listing(driver)
             if not items:
                 print("[stop] No products detected. Possibly verification or location selection required.")
                 print("Open the page in the browser, ensure products are visible, then press Enter.")
@@ -146,7 +219,7 @@ def main():
 
                 # Autosave progress every 10 items
                 if len(rows) % 10 == 0:
-                    pd.DataFrame(rows).to_excel(OUT_FILE, index=False)
+                    save_xlsx(pd.DataFrame(rows), OUT_FILE)
                     print(f"[autosave] {len(rows)} items saved -> {OUT_FILE}")
 
             print(f"[ok] Added from this page: {added}. Total: {len(rows)}/{LIMIT}")
@@ -158,7 +231,7 @@ def main():
             time.sleep(1)
 
         df = pd.DataFrame(rows[:LIMIT])
-        df.to_excel(OUT_FILE, index=False)
+        save_xlsx(df, OUT_FILE)
         print(f"\n[done] Saved {len(df)} products -> {OUT_FILE}")
 
     finally:
@@ -1,3 +1,5 @@
+import atexit
+import functools
 from pathlib import Path
 
 from selenium import webdriver
@@ -11,65 +13,98 @@ from selenium.webdriver.firefox.service import Service
 
 URL = "https://quotes.toscrape.com/js/"
 
-
-def create_driver() -> webdriver.Firefox:
+NEXT_PAGE_JS = """
+const a = document.querySelector('li.next a');
+if (!a) return false;
+a.click();
+return true;
+"""
+
+QUOTES_JS = """
+return Array.from(document.querySelectorAll('.quote')).map(q => ({
+    text: q.querySelector('.text').innerText,
+    author: q.querySelector('.author').innerText,
+    tags: Array.from(q.querySelectorAll('.tag')).map(t => t.innerText).join(', '),
+}));
+"""
+
+
+@functools.lru_cache(maxsize=1)
+def get_driver() -> webdriver.Firefox:
+    """Start Firefox once per process; later calls reuse the same session."""
     options = Options()
     # options.add_argument("-headless") 
+    options.set_preference("permissions.default.image", 2)
 
     service = Service(GeckoDriverManager().install())
-    return webdriver.Firefox(service=service, options=options)
+    driver = webdriver.Firefox(service=service, options=options)
+    atexit.register(driver.quit)
+    return driver
 
 
 def parse_page(driver) -> list[dict]:
     WebDriverWait(driver, 10).until(
-        EC.presence_of_all_elements_located((By.CLASS_NAME, "quote"))
+        EC.presence_of_element_located((By.CLASS_NAME, "quote"))
     )
 
-    rows = []
-    for q in driver.find_elements(By.CLASS_NAME, "quote"):
-        text = q.find_element(By.CLASS_NAME, "text").text
-        author = q.find_element(By.CLASS_NAME, "author").text
-        tags = [t.text for t in q.find_elements(By.CLASS_NAME, "tag")]
-        rows.append({"text": text, "author": author, "tags": ", ".join(tags)})
-    return rows
+    # Extract every quote in the browser: one WebDriver call per page
+    return driver.execute_script(QUOTES_JS)
 
 
 def save_csv(rows: list[dict], path: str) -> None:
     import csv
 
     Path(path).parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=rows[0].keys())
-        w.writeheader()
-        w.writerows(rows)
+    with open(path, "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
+        # Plain csv.writer over value lists; DictWriter re-maps every row by key
+        keys = list(rows[0].keys())
+        w = csv.writer(f)
+        w.writerow(keys)
+        w.writerows([r[k] for k in keys] for r in rows)
 
 
 def save_xlsx(rows: list[dict], path: str) -> None:
-    import openpyxl
-
     Path(path).parent.mkdir(parents=True, exist_ok=True)
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "quotes"
-    ws.append(list(rows[0].keys()))
-    for r in rows:
-        ws.append(list(r.values()))
-    wb.save(path)
+    header = list(rows[0].keys())
+
+    # pyexcelerate is an optional, faster writer for plain (unstyled) cells
+    try:
+        from pyexcelerate import Workbook
+    except ImportError:
+        Workbook = None
+
+    if Workbook is not None:
+        wb = Workbook()
+        wb.new_sheet("quotes", data=[header] + [list(r.values()) for r in rows])
+        wb.save(path)
+        return
+
+    import xlsxwriter
+
+    wb = xlsxwriter.Workbook(path, {"constant_memory": True, "strings_to_urls": False})
+    ws = wb.add_worksheet("quotes")
+    ws.write_row(0, 0, header)
+    for i, r in enumerate(rows, start=1):
+        ws.write_row(i, 0, list(r.values()))
+    wb.close()
 
 
 def main():
-    driver = create_driver()
+    driver = get_driver()
     driver.get(URL)
 
     all_rows = []
     for _ in range(3):
         all_rows.extend(parse_page(driver))
-        try:
-            driver.find_element(By.CSS_SELECTOR, "li.next a").click()
-        except Exception:
-            break
 
-    driver.quit()
+        # A click inside execute_script returns before the navigation
+        # finishes, so wait until the old page's quotes are gone; otherwise
+        # parse_page could read page N again or run while it unloads.
+        old_quote = driver.find_element(By.CLASS_NAME, "quote")
+        if not driver.execute_script(NEXT_PAGE_JS):
+            break
+        # Poll often: the default 0.5 s interval would add a fixed sleep per page
+        WebDriverWait(driver, 10, poll_frequency=0.05).until(EC.staleness_of(old_quote))
 
     save_csv(all_rows, "data/quotes_firefox.csv")
     save_xlsx(all_rows, "data/quotes_firefox.xlsx")